@@ -10,9 +10,9 @@ Requirements:
 """
 
 import datetime
+from zoneinfo import ZoneInfo
 
 import boto3
-import pytz  # For handling timezone
 from botocore.exceptions import ClientError
 
 
@@ -74,9 +74,8 @@ def create_initial_key_value(table_name, key_name, initial_value):
     dynamodb = boto3.resource('dynamodb')
     table = dynamodb.Table(table_name)
 
-    # Get current time in UTC and convert it to US Central Time (UTC-6)
-    utc_now = datetime.datetime.now(pytz.utc)
-    central_time = utc_now.astimezone(pytz.timezone('US/Central'))
+    # Get current time directly in US Central Time
+    central_time = datetime.datetime.now(ZoneInfo('US/Central'))
 
     try:
         response = table.put_item(
@@ -9,10 +9,30 @@ corresponding to mailbox events.
 """
 
 import json
+import logging
 import os
 
 from mailbox_state_machine import MailboxStateMachine
 
+# Level-gated logging instead of unconditional print: with the default WARNING level
+# the debug strings are never formatted and nothing is written to CloudWatch on the
+# happy path.
+LOG = logging.getLogger()
+LOG.setLevel(os.getenv('LOG_LEVEL', 'WARNING'))
+
+# Read and validate configuration at module load: a misconfigured deploy fails the
+# cold start immediately instead of failing every request, and the per-event
+# os.environ lookups and checks disappear from the hot path.
+SNS_ARN = os.environ['MAILBOX_SNS_ARN']
+DYNAMODB_NAME = os.environ['MAILBOX_DYNAMODB_TABLE']
+
+# The state machine (and the boto3 clients it holds) is cached for the life of the
+# Lambda container so warm invocations skip client construction entirely. When
+# MAILBOX_DAX_ENDPOINT is set, table traffic goes through that DAX cluster instead
+# of DynamoDB directly.
+_MAILBOX = MailboxStateMachine(SNS_ARN, DYNAMODB_NAME,
+                               dax_endpoint=os.getenv('MAILBOX_DAX_ENDPOINT'))
+
 
 def http_message(code, msg):
     """
@@ -51,27 +71,31 @@ def handler(event, context):
     Returns:
         dict: The HTTP response object.
     """
-    print(f"event:\n{event}")
-    print(f"context:\n{context}")
+    LOG.debug("event: %s", event)
+    LOG.debug("context: %s", context)
 
-    if 'open' in event['path']:
+    # Read the path once and match on its suffix instead of scanning it twice.
+    # Function URL payloads carry 'rawPath'; REST API Gateway payloads carry 'path'.
+    raw_path = event.get('rawPath') or event.get('path', '')
+    if raw_path.endswith('/open'):
         mailbox_status = 'open'
-    elif 'closed' in event['path']:
+    elif raw_path.endswith('/closed'):
         mailbox_status = 'closed'
     else:
-        print("Error: Invalid mailbox status.")
+        LOG.error("Invalid mailbox status.")
         return http_message(400, 'Invalid mailbox status.')
 
-    sns_arn = os.getenv('MAILBOX_SNS_ARN')
-    dynamodb_name = os.getenv('MAILBOX_DYNAMODB_TABLE')
-
-    if not sns_arn or not dynamodb_name:
-        print("Error: SNS_ARN and DYNAMODB_TABLE environment variables are required.")
-        return http_message(500, 'SNS_ARN and DYNAMODB_TABLE environment variables are required.')
-
-    mailbox = MailboxStateMachine(sns_arn, dynamodb_name)
-
-    mailbox.handle_event(mailbox_status)
-    print(f"Event:'{mailbox_status}', State: {mailbox.state}, DB: {mailbox.get_db_value()}")
+    mailbox = _MAILBOX
+
+    try:
+        mailbox.handle_event(mailbox_status)
+    finally:
+        # Flush background SNS publishes even if event handling fails; Lambda freezes
+        # threads between invocations, so nothing may be left in flight.
+        mailbox.flush_publishes()
+    # The DB read is for the log line only, so guard it behind the level check.
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug("Event:'%s', State: %s, DB: %s",
+                  mailbox_status, mailbox.state, mailbox.get_db_value())
 
     return http_message(200, 'Success')